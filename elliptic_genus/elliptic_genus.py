@@ -39,17 +39,112 @@ from sage.all import (
     PolynomialRing,
     LaurentPolynomialRing,
     LazyLaurentSeriesRing,
+    PowerSeriesRing,
     QQ,
     Partitions,
-    prod,
+    balanced_sum,
 )
 from elliptic_genus.utils import *
+from elliptic_genus.utils import _monomial_to_elementary
 from homogeneous_space.interfaces import AlmostComplexManifold
 
+from collections import Counter
 from functools import cache
+from multiprocessing import Pool
+
+# Chern根x, y, qの平坦な環と, その係数を表すyのLaurent多項式環
+_R = LaurentPolynomialRing(QQ, ["x", "y", "q"])
+_L = LaurentPolynomialRing(QQ, "y")
+
+
+@cache
+def _chern_rings(dim: int) -> tuple:
+    r"""
+    Return the tuple ``(S0, S1, S)`` of the rings used to express
+    the coefficients of elliptic genera of manifolds of dimension ``dim``.
+
+    Here ``S0`` is the polynomial ring of the Chern classes `c_0, \ldots, c_{dim}`,
+    ``S1`` is the Laurent polynomial ring in `y` over ``S0`` and
+    ``S`` is the lazy Laurent series ring in `q` over ``S1``.
+    """
+    S0 = PolynomialRing(QQ, "c", dim + 1)
+    S1 = LaurentPolynomialRing(S0, "y")
+    S = LazyLaurentSeriesRing(S1, "q")
+
+    return S0, S1, S
+
+
+# x, y, qの平坦な環でのカットオフ付きの計算
+@cache
+def _ell_factor_sparse(dim: int, k: int) -> list:
+    r"""
+    Return the list which ``i``-th component is the list of the
+    coefficients of `x^n q^i` (`0 \le n \le dim`) of the expression
+    in :func:`ell_factor_coeff_degreewise` for `0 \le i \le k`.
+
+    The computation is carried out in the flat ring
+    `\QQ[x, y^{\pm 1}, q]`, truncating the degree of `x` at ``dim``
+    and the degree of `q` at ``k`` after every multiplication.
+    The infinite product is obtained as the exponential of its
+    logarithm `-\sum_{n, j} q^{nj} (y^j e^{-jx} + y^{-j} e^{jx} - e^{-jx} - e^{jx}) / j`,
+    so that only ``k`` truncated multiplications are needed for it.
+
+    INPUT:
+
+    - ``dim`` -- integer -- the dimension of the considering manifold
+
+    - ``k`` -- integer
+
+    OUTPUT:
+
+    the list of lists of Laurent polynomials in `y` over `\QQ`.
+
+    EXAMPLES::
+
+        sage: from elliptic_genus.elliptic_genus import _ell_factor_sparse
+        sage: _ell_factor_sparse(2, 1)
+        [[1 - y, 1/2 + 1/2*y, 1/12 - 1/12*y],
+         [-y^-1 + 3 - 3*y + y^2, -3/2*y^-1 + 3/2 + 3/2*y - 3/2*y^2, -13/12*y^-1 + 5/4 - 5/4*y + 13/12*y^2]]
+    """
+    R = _R
+    x, y, q = R.gens()
+
+    def trunc(f):  # xをdim次, qをk次でカットオフ
+        return R({e: c for e, c in f.dict().items() if e[0] <= dim and e[2] <= k})
+
+    def mul_trunc(f, g):  # カットオフした積
+        return trunc(f * g)
+
+    # 無限積の対数 log(1 - u) = -\sum_j u^j / j をqのk次まで足し合わせる
+    log_prod = R.zero()
+    for n in range(1, k + 1):
+        for j in range(1, k // n + 1):
+            e_minus, e_plus = exp_cut(-j * x, dim), exp_cut(j * x, dim)
+            log_prod -= (
+                QQ((1, j))
+                * q ** (n * j)
+                * (y**j * e_minus + y ** (-j) * e_plus - e_minus - e_plus)
+            )
+    log_prod = trunc(log_prod)
+
+    # log_prodはqについて1次以上なので, expはk次までのHorner法で十分
+    result = R.one()
+    for m in range(k, 0, -1):
+        result = R.one() + QQ((1, m)) * mul_trunc(log_prod, result)
+
+    result = mul_trunc(result, 1 - y * exp_cut(-x, dim))
+    result = mul_trunc(result, todd_cut(x, dim))
+
+    # 項の辞書のまま振り分け, 最後に一度だけyのLaurent多項式に持ち上げる
+    terms = [[{} for n in range(dim + 1)] for i in range(k + 1)]
+    for e, c in result.dict().items():
+        terms[e[2]][e[0]][e[1]] = c
+
+    return [[_L(d) for d in ds] for ds in terms]
 
 
 # qのk次までに必要な係数の計算
+@cache
 def ell_factor_coeff_degreewise(dim: int, k: int) -> list:
     r"""
     Return the list which n-th component is the coefficients of
@@ -85,58 +180,13 @@ def ell_factor_coeff_degreewise(dim: int, k: int) -> list:
          -133/80*y^-1 + 159/80 - 159/80*y + 133/80*y^2,
          -3/4*y^-1 + 3/4 + 3/4*y - 3/4*y^2]
     """
-    R0 = PolynomialRing(QQ, "x", dim)
-    x = R0.gens()  # Chern根の変数
-
-    R1 = LaurentPolynomialRing(R0, "y_")
-    y_ = R1.gen()
-    R = LazyLaurentSeriesRing(R1, "q_")
-    q_ = R.gen()
-
-    S0 = PolynomialRing(QQ, "c", dim + 1)
-    c = S0.gens()  # Chern根の変数
-
-    S1 = LaurentPolynomialRing(S0, "y")
-    y = S1.gen()
-
-    def factor(x, m):  # 無限積の因子
-        numer = (1 - y_ * q_ * exp_cut(-x, m)) * (1 - y_ ** (-1) * q_ * exp_cut(x, m))
-        denom = (1 - q_ * exp_cut(-x, m)) * (1 - q_ * exp_cut(x, m))
-
-        return numer / denom
+    S0, S1, S = _chern_rings(dim)
 
-    # 変数xに関するqがk次までの式(上の式のnはi)
-    def elliptic_factor(x, n):
-        term1 = prod(
-            cutoff(factor(x, dim), dim)(q_**i) for i in range(1, n + 1)
-        ).approximate_series(n + 1)
-        term2 = 1 - y_ * exp_cut(-x, dim)
-        term3 = todd_cut(x, dim)
-
-        return cutoff(term1 * term2 * term3, dim)
-
-    ell_fac = elliptic_factor(x[0], k + 1)[k]
-    # y多項式としてみた時の係数の配列
-    ell_fac_yc = list(ell_fac)
-    val = ell_fac.valuation()
-
-    result_element = 0
-    for j in range(len(ell_fac_yc)):
-        result_element += QQ(ell_fac_yc[j].constant_coefficient()) * y ** (j + val)
-
-    result = [result_element]
-
-    for i in range(1, dim + 1):
-        result_element = 0
-        for j in range(len(ell_fac_yc)):
-            result_element += QQ(ell_fac_yc[j].coefficient(x[0] ** i)) * y ** (j + val)
-
-        result += [result_element]
-
-    return result
+    return [S1(f) for f in _ell_factor_sparse(dim, k)[k]]
 
 
 # k次までの和
+@cache
 def ell_factor_coeff(dim: int, k: int) -> list:
     r"""
     Return the list which n-th component is the coefficients of `x^n`
@@ -176,28 +226,44 @@ def ell_factor_coeff(dim: int, k: int) -> list:
          (-1/24*y^-1 + 1/24 + 1/24*y - 1/24*y^2)*q + (-3/4*y^-1 + 3/4 + 3/4*y - 3/4*y^2)*q^2]
 
     """
-    R0 = PolynomialRing(QQ, "x", dim)
-    x = R0.gens()  # Chern根の変数
+    S0, S1, S = _chern_rings(dim)
 
-    R1 = LaurentPolynomialRing(R0, "y_")
-    y_ = R1.gen()
-    R = LazyLaurentSeriesRing(R1, "q_")
-    q_ = R.gen()
+    # qのk次までの係数を一度にまとめて計算する
+    coeffs = [[S1(f) for f in fs] for fs in _ell_factor_sparse(dim, k)]
 
-    S0 = PolynomialRing(QQ, "c", dim + 1)
-    c = S0.gens()  # Chern根の変数
+    # 係数のリストから直接qの級数を構成する
+    return [S([coeffs[i][j] for i in range(k + 1)]) for j in range(dim + 1)]
 
-    S1 = LaurentPolynomialRing(S0, "y")
-    y = S1.gen()
-    S = LazyLaurentSeriesRing(S1, "q")
-    q = S.gen()
 
-    coeffs = [ell_factor_coeff_degreewise(dim, i) for i in range(k + 1)]
+# 分割ごとの単項式の係数. 並列計算のためモジュールレベルで定義する
+def _monomial_coeff(dim: int, k: int, part: tuple):
+    S0, S1, S = _chern_rings(dim)
+    result_ring = PowerSeriesRing(S1, "q")
+
+    # 同じ因子はまとめて冪乗で計算する
+    exponents = Counter(part)
+    exponents[0] += dim - len(part)
+
+    # qのk次まで恒等的に0となる因子があれば積は計算しない
+    sparse = _ell_factor_sparse(dim, k)
+    if any(all(fs[d].is_zero() for fs in sparse) for d in exponents):
+        return result_ring.zero().add_bigoh(k + 1)
+
+    # 遅延級数ではなく, qのk次で切り捨てた多項式として積を計算する
+    P = PolynomialRing(S1, "q")
+    result = P.one()
+    for d, e in exponents.items():
+        factor = P([S1(fs[d]) for fs in sparse])
+        result = (result * factor.power_trunc(e, k + 1)).truncate(k + 1)
 
-    return [sum(coeffs[i][j] * q**i for i in range(k + 1)) for j in range(dim + 1)]
+    return result_ring(result).add_bigoh(k + 1)
 
 
-def ell_coeff(dim: int, k: int) -> dict:
+# 計算済みの係数. 値はプロセス数によらないので, (dim, k)だけをキーにする
+_ell_coeffs = {}
+
+
+def ell_coeff(dim: int, k: int, processes: int = 1) -> dict:
     r"""
     Return a dictionary where the keys represent partitions of dim,
     and the values correspond to the coefficients of the elliptic genus
@@ -219,6 +285,10 @@ def ell_coeff(dim: int, k: int) -> dict:
 
     - ``k`` -- integer
 
+    - ``processes`` -- integer (default: 1) -- the number of worker
+      processes; if it is greater than 1, the coefficients for the
+      partitions are computed in parallel
+
     OUTPUT:
 
     the dictionary where the keys represent partitions of dim,
@@ -238,23 +308,29 @@ def ell_coeff(dim: int, k: int) -> dict:
          [5]: (-1/24*y^-1 + 5/24 - 3/8*y + 5/24*y^2 + 5/24*y^3 - 3/8*y^4 + 5/24*y^5 - 1/24*y^6)*q + (1/6*y^-2 - 23/12*y^-1 + 85/12 - 137/12*y + 73/12*y^2 + 73/12*y^3 - 137/12*y^4 + 85/12*y^5 - 23/12*y^6 + 1/6*y^7)*q^2 + O(q^3)}
 
     """
-    # R0 = PolynomialRing(QQ, "x", dim)
-    # x = R0.gens()  # Chern根の変数
+    if (dim, k) not in _ell_coeffs:
+        _ell_coeffs[dim, k] = _ell_coeff(dim, k, processes)
+    return _ell_coeffs[dim, k]
 
-    # R1 = LaurentPolynomialRing(R0, "y")
-    # y = R1.gen()
 
-    # R = LazyLaurentSeriesRing(R1, "q")
-    # q = R.gen()
+def _ell_coeff(dim: int, k: int, processes: int) -> dict:
+    r"""
+    Return the dictionary of :func:`ell_coeff`, with the coefficients for the
+    partitions computed in ``processes`` worker processes.
+    """
+    parts = Partitions(dim).list()
 
-    efc = ell_factor_coeff(dim, k)
+    if processes <= 1:
+        return {part: _monomial_coeff(dim, k, tuple(part)) for part in parts}
 
-    return {
-        part: (
-            prod(efc[part[i]] for i in range(len(part))) * efc[0] ** (dim - len(part))
-        ).approximate_series(k + 1)
-        for part in Partitions(dim)
-    }
+    # 子プロセスが引き継げるように先にキャッシュしておく
+    _ell_factor_sparse(dim, k)
+    with Pool(processes) as pool:
+        values = pool.starmap(
+            _monomial_coeff, [(dim, k, tuple(part)) for part in parts]
+        )
+
+    return dict(zip(parts, values))
 
 
 @cache
@@ -289,10 +365,20 @@ def elliptic_genus_chernnum(dim: int, k: int):
     if dim == 0:
         return 1
     else:
+        S0, S1, S = _chern_rings(dim)
         coeff = ell_coeff(dim, k)
-        return sum(
-            coeff[part] * chernnum_from_partition(dim, part) for part in Partitions(dim)
-        )
+        chernnum = chernnum_table(dim)
+
+        # 入れ子の環で積和を取らず, (qの次数, yの指数)ごとに
+        # Chern数の多項式環S0の中で一次結合をまとめる
+        terms = [{} for i in range(k + 1)]
+        for part in Partitions(dim):
+            cn = chernnum[tuple(part)]
+            for i in range(k + 1):
+                for j, c in coeff[part][i].dict().items():
+                    terms[i][j] = terms[i].get(j, S0.zero()) + c * cn
+
+        return PowerSeriesRing(S1, "q")([S1(d) for d in terms]).add_bigoh(k + 1)
 
 
 from homogeneous_space.interfaces import AlmostComplexManifold
@@ -353,11 +439,10 @@ def elliptic_genus(manifold: AlmostComplexManifold, k: int, option="symbolic"):
         for part in Partitions(manifold.dimension())
     }
 
-    m = SymmetricFunctions(QQ).m()
-    e = SymmetricFunctions(QQ).e()
+    m_to_e = _monomial_to_elementary(manifold.dimension())
 
     def from_partition(part):
-        ls = list(e(m(part)))
+        ls = m_to_e[tuple(part)]
         result = 0
 
         for degs, c in ls:
@@ -365,7 +450,9 @@ def elliptic_genus(manifold: AlmostComplexManifold, k: int, option="symbolic"):
         return result
 
     coeff = ell_coeff(manifold.dimension(), k)
-    return sum(
-        coeff[part] * QQ(from_partition(part))
-        for part in Partitions(manifold.dimension())
+    return balanced_sum(
+        [
+            coeff[part] * QQ(from_partition(part))
+            for part in Partitions(manifold.dimension())
+        ]
     )
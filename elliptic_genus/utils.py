@@ -14,12 +14,16 @@ Module contains common functions used in intermediate calculations
 # ****************************************************************************
 
 import math
+from functools import cache
+from itertools import combinations
 from sage.all import (
     PolynomialRing,
     LaurentPolynomialRing,
     LazyLaurentSeriesRing,
     QQ,
-    SymmetricFunctions,
+    ZZ,
+    matrix,
+    Partitions,
     exp,
 )
 
@@ -27,6 +31,24 @@ _L = LazyLaurentSeriesRing(QQ, "z")
 _z = _L.gen()
 
 
+@cache
+def _todd_poly(m):
+    r"""
+    Return the truncation of `\frac{z}{1 - e^{-z}}` at degree ``m``
+    as a univariate polynomial over `\QQ`.
+    """
+    return _L(_z / (1 - exp(-_z)), degree=m + 1).polynomial()
+
+
+@cache
+def _exp_poly(m):
+    r"""
+    Return the truncation of `e^z` at degree ``m`` as a univariate
+    polynomial over `\QQ`.
+    """
+    return _L(exp(_z), degree=m + 1).polynomial()
+
+
 def todd_cut(x, m):  # mでカットオフ
     r"""
     Return the truncation of `\frac{x}{1 - e^{-x}}` at degree ``m``.
@@ -49,8 +71,7 @@ def todd_cut(x, m):  # mでカットオフ
         1 + 1/2*z + 1/12*z^2 - 1/720*z^4
 
     """
-    t = _L(_z / (1 - exp(-_z)), degree=m + 1).polynomial()
-    return t(x)
+    return _todd_poly(m)(x)
 
 
 def exp_cut(x, m):  # mでカットオフ
@@ -76,8 +97,16 @@ def exp_cut(x, m):  # mでカットオフ
         1 + z + 1/2*z^2 + 1/6*z^3 + 1/24*z^4 + 1/120*z^5
 
     """
-    e = _L(exp(_z), degree=m + 1).polynomial()
-    return e(x)
+    return _exp_poly(m)(x)
+
+
+def _total_degree(e):  # dict()のキーの全次数
+    r"""
+    Return the total degree of the exponent ``e``, which is a key of
+    ``dict()`` of either a univariate polynomial (an integer) or
+    a multivariate polynomial (an ``ETuple``).
+    """
+    return e if isinstance(e, int) else sum(e)
 
 
 def cutoff_for_coeff(m):  # xの式に対するcutoff
@@ -100,10 +129,14 @@ def cutoff_for_coeff(m):  # xの式に対するcutoff
         sage: R0.<x0, x1> = PolynomialRing(QQ)
         sage: cutoff_for_coeff(2)(x0 + x0 * x1 - 2 * x1^4)
         x0*x1 + x0
-
+        sage: R.<x> = PolynomialRing(QQ)
+        sage: cutoff_for_coeff(2)(1 + x + x^3)
+        x + 1
 
     """
-    return lambda f: sum(c * mono for c, mono in f if mono.total_degree() <= m)
+    return lambda f: f.parent()(
+        {e: c for e, c in f.dict().items() if _total_degree(e) <= m}
+    )
 
 
 def cutoff(f, m):  # x, y, qの式に対して, xの上の字数をcutoffする
@@ -160,7 +193,9 @@ def homogeneous_for_coeff(m):  # xの式に対するhomogeneous part
         x0*x1
 
     """
-    return lambda f: sum(c * mono for c, mono in f if mono.total_degree() == m)
+    return lambda f: f.parent()(
+        {e: c for e, c in f.dict().items() if _total_degree(e) == m}
+    )
 
 
 def homogeneous_part(f, m):  # x, y, qの式に対して, xの上の字数をhomogeneous part
@@ -225,13 +260,93 @@ def chernnum_from_partition(dim: int, part):
         c1^5 - 5*c1^3*c2 + 5*c1*c2^2 + 5*c1^2*c3 - 5*c2*c3 - 5*c1*c4 + 5*c5
         sage: chernnum_from_partition(3, [2,1])
         c1*c2 - 3*c3
+        sage: chernnum_from_partition(2, [1,1,1])
+        0
 
     """
+    return _chernnum_from_partition(dim, tuple(sorted(part, reverse=True)))
+
+
+# 行和がrows, 列和がcolsとなる0-1行列の個数
+@cache
+def _count_01_matrices(rows: tuple, cols: tuple) -> int:
+    r"""
+    Return the number of `0`-`1` matrices with row sums ``rows`` and
+    column sums ``cols``, which is the coefficient of the monomial
+    symmetric function `m_{cols}` in the elementary symmetric
+    function `e_{rows}`.
+    """
+    if not rows:
+        return int(all(c == 0 for c in cols))
+
+    total = 0
+    for columns in combinations(range(len(cols)), rows[0]):
+        rest = list(cols)
+        for j in columns:
+            rest[j] -= 1
+        if any(c < 0 for c in rest):
+            continue
+        # 列の順序は個数に影響しないので, 整列してキャッシュを共有する
+        total += _count_01_matrices(
+            rows[1:], tuple(sorted((c for c in rest if c > 0), reverse=True))
+        )
+    return total
+
+
+@cache
+def _monomial_to_elementary(n: int) -> dict:
+    r"""
+
+    Return the dictionary which maps each partition of ``n`` to the list of
+    pairs of a partition and a coefficient, which expresses the monomial
+    symmetric function of the key by the elementary symmetric functions.
+
+    The expansion of `e_\mu` in the monomial basis is given by counting
+    `0`-`1` matrices, and the coefficients are obtained by inverting
+    this integer matrix once for each ``n``.
+
+    INPUT:
+
+    - ``n`` -- non-negative integer -- the degree of symmetric functions.
+
+    EXAMPLES::
 
-    m = SymmetricFunctions(QQ).m()
-    e = SymmetricFunctions(QQ).e()
+        sage: from elliptic_genus.utils import _monomial_to_elementary
+        sage: _monomial_to_elementary(3)
+        {(1, 1, 1): [([3], 1)],
+         (2, 1): [([3], -3), ([2, 1], 1)],
+         (3,): [([3], 3), ([2, 1], -3), ([1, 1, 1], 1)]}
+
+    """
+    parts = Partitions(n).list()
+    T = matrix(
+        ZZ,
+        [[_count_01_matrices(tuple(mu), tuple(la)) for la in parts] for mu in parts],
+    ).inverse()
+
+    return {
+        tuple(parts[i]): [
+            (parts[j], T[i, j]) for j in range(len(parts)) if T[i, j] != 0
+        ]
+        for i in range(len(parts))
+    }
+
+
+@cache
+def _chernnum_from_partition(dim: int, part: tuple):
+    r"""
+
+    Cached implementation of :func:`chernnum_from_partition`, where
+    the partition ``part`` is given as a tuple.
+
+    """
 
     S0 = PolynomialRing(QQ, "c", dim + 1)
+
+    # Chern根はdim個なので, dimより多くの変数を含む単項式は0になる
+    if len(part) > dim:
+        return S0.zero()
+
     c = S0.gens()  # Chern根の変数
 
     def monomial(degs):
@@ -243,5 +358,34 @@ def chernnum_from_partition(dim: int, part):
                 result = result * c[deg]
         return result
 
-    ls = list(e(m(part)))
+    ls = _monomial_to_elementary(sum(part))[part]
     return sum(c * monomial(degs) for degs, c in ls)
+
+
+@cache
+def chernnum_table(dim: int) -> dict:
+    r"""
+
+    Return the dictionary which maps each partition of ``dim`` to
+    :func:`chernnum_from_partition` of it.
+
+    INPUT:
+
+    - ``dim`` -- integer -- the dimension of the considering manifold.
+
+    OUTPUT:
+
+    the dictionary, where the keys are partitions of ``dim`` as tuples and
+    the values are the combinations of Chern classes equal to the monomials
+    of Chern roots with multidegree of the keys.
+
+    EXAMPLES::
+
+        sage: from elliptic_genus.utils import chernnum_table
+        sage: chernnum_table(3)
+        {(1, 1, 1): c3, (2, 1): c1*c2 - 3*c3, (3,): c1^3 - 3*c1*c2 + 3*c3}
+
+    """
+    return {
+        tuple(part): chernnum_from_partition(dim, part) for part in Partitions(dim)
+    }
@@ -0,0 +1,277 @@
+r"""
+Module contains common functions extracting graded pieces of polynomials and evaluating them
+"""
+
+
+# ****************************************************************************
+#       Copyright (C) 2023 KENTA KOBAYASHI <kenta.topos@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#                  https://www.gnu.org/licenses/
+# ****************************************************************************
+
+from sage.all import binomial, fast_callable, Integer, Sequence
+from sage.ext.fast_callable import ExpressionTreeBuilder
+from functools import lru_cache
+
+
+# 項の指数と係数の組. 指数は次数を直接読めるETupleで取り出す.
+# 辞書`F.dict()`を作るより速い
+def _terms(F):
+    return zip(F.exponents(as_ETuples=True), F.coefficients())
+
+
+# `degree`次部分を取り出す関数
+def homogeneous_part(F, degree: int):
+    r"""
+
+    Return the homogeneous part of the polynomial ``F`` of total degree ``degree``.
+
+    EXAMPLES::
+
+        sage: from homogeneous_space._polyutil import homogeneous_part
+        sage: R.<x0, x1> = PolynomialRing(QQ)
+        sage: homogeneous_part(1 + x0 + x0 * x1 - 2 * x1^2 + x1^3, 2)
+        x0*x1 - 2*x1^2
+
+    """
+    return F.parent()({e: c for e, c in _terms(F) if e.unweighted_degree() == degree})
+
+
+# 0次から`max_degree`次までの斉次部分を一度の走査でまとめて取り出す関数
+def homogeneous_parts(F, max_degree: int) -> list:
+    r"""
+
+    Return the list of the homogeneous parts of the polynomial ``F``
+    of total degree `0, 1, \ldots,` ``max_degree``.
+
+    EXAMPLES::
+
+        sage: from homogeneous_space._polyutil import homogeneous_parts
+        sage: R.<x0, x1> = PolynomialRing(QQ)
+        sage: homogeneous_parts(1 + x0 + x0 * x1 - 2 * x1^2 + x1^3, 2)
+        [1, x0, x0*x1 - 2*x1^2]
+
+    """
+    R = F.parent()
+    terms = [{} for i in range(max_degree + 1)]
+    for e, c in _terms(F):
+        d = e.unweighted_degree()
+        if d <= max_degree:
+            terms[d][e] = c
+    return [R(t) for t in terms]
+
+
+# 項の辞書のまま, `degree`次より高い項を作らずに積を計算する関数
+def _mul_truncation_dict(A: dict, B: dict, degree: int) -> dict:
+    r"""
+    Return the dictionary of the terms of total degree at most ``degree``
+    of the product of the polynomials whose dictionaries are ``A`` and ``B``.
+    """
+    terms_B = [(eb, cb, sum(eb)) for eb, cb in B.items()]
+    result = {}
+    for ea, ca in A.items():
+        rest = degree - sum(ea)
+        for eb, cb, db in terms_B:
+            if db <= rest:
+                e = ea.eadd(eb)
+                result[e] = result.get(e, 0) + ca * cb
+    return {e: c for e, c in result.items() if c != 0}
+
+
+# 因子の積を`degree`次で切り捨てて計算する関数
+def product_truncation(factors, degree: int, ring):
+    r"""
+
+    Return the truncation of the product of the polynomials ``factors``
+    in ``ring`` at total degree ``degree``, where the terms of higher
+    degree are never formed.
+
+    EXAMPLES::
+
+        sage: from homogeneous_space._polyutil import product_truncation
+        sage: R.<x0, x1> = PolynomialRing(QQ)
+        sage: product_truncation([1 + x0, 1 + x1, 1 - x0 - x1], 1, R)
+        1
+
+    """
+    return ring(_product_truncation_dict(factors, degree, ring))
+
+
+# 因子の積を項の辞書のまま`degree`次で切り捨てて計算する関数
+def _product_truncation_dict(factors, degree: int, ring) -> dict:
+    result = ring.one().dict()
+    for F in factors:
+        result = _mul_truncation_dict(result, F.dict(), degree)
+    return result
+
+
+# 因子の積の0次から`max_degree`次までの斉次部分を, 積を多項式に戻さずに取り出す関数
+def graded_product_truncation(factors, max_degree: int, ring) -> list:
+    r"""
+
+    Return the list of the homogeneous parts of total degree
+    `0, 1, \ldots,` ``max_degree`` of the product of the polynomials
+    ``factors`` in ``ring``. The product is formed on the dictionaries
+    of terms and only its homogeneous parts are made into polynomials.
+
+    EXAMPLES::
+
+        sage: from homogeneous_space._polyutil import graded_product_truncation
+        sage: R.<x0, x1> = PolynomialRing(QQ)
+        sage: graded_product_truncation([1 + x0, 1 + x1, 1 - x0 - x1], 2, R)
+        [1, 0, -x0^2 - x0*x1 - x1^2]
+
+    """
+    terms = [{} for i in range(max_degree + 1)]
+    for e, c in _product_truncation_dict(factors, max_degree, ring).items():
+        terms[sum(e)][e] = c
+    return [ring(t) for t in terms]
+
+
+# 一次式`L`ごとの因子`(1 + L)^i`の積の斉次部分を, 次数ごとの層を順に更新して計算する関数.
+# 因子を掛けるたびに`c_k <- c_k + L * c_{k-1}`とするので, 積を展開しない
+def graded_linear_product(linear_forms, max_degree: int, ring) -> list:
+    r"""
+
+    Return the list of the homogeneous parts of total degree
+    `0, 1, \ldots,` ``max_degree`` of the product of `(1 + L)^i`, where
+    the pairs `(L, i)` of linear forms and exponents run over ``linear_forms``.
+
+    EXAMPLES::
+
+        sage: from homogeneous_space._polyutil import graded_linear_product
+        sage: R.<x0, x1> = PolynomialRing(QQ)
+        sage: graded_linear_product([(x0, 2), (-x0 - x1, 1)], 2, R)
+        [1, x0 - x1, -x0^2 - 2*x0*x1]
+        sage: graded_linear_product([(x0, 5)], 2, R)
+        [1, 5*x0, 10*x0^2]
+
+    """
+    graded = [ring.one()] + [ring.zero()] * max_degree
+    for L, i in linear_forms:
+        if i > max_degree:
+            # 重複度が次数より大きければ, 二項展開 (1 + L)^i = \sum_j binom(i, j) L^j を一度に掛ける
+            powers = [ring.one()]
+            for j in range(max_degree):
+                powers.append(powers[-1] * L)
+            graded = [
+                sum(binomial(i, j) * powers[j] * graded[k - j] for j in range(k + 1))
+                for k in range(max_degree + 1)
+            ]
+            continue
+        for _ in range(i):
+            # 高い次数から更新すれば, 右辺の`graded[k - 1]`は更新前のまま
+            for k in range(max_degree, 0, -1):
+                graded[k] += L * graded[k - 1]
+    return graded
+
+
+# 同じ値の組を複数の多項式に代入する関数. 単項式の値は多項式の間で共有し,
+# それぞれ一つ低い単項式の値に一つの値を掛けて作る
+def substitute_all(polynomials, values) -> list:
+    r"""
+
+    Return the list of the values of ``polynomials`` at ``values``, where
+    the value of each monomial is computed only once for all the
+    polynomials, by multiplying the value of a monomial of one lower degree.
+
+    EXAMPLES::
+
+        sage: from homogeneous_space._polyutil import substitute_all
+        sage: R.<c1, c2> = PolynomialRing(QQ)
+        sage: S.<x> = PolynomialRing(QQ)
+        sage: substitute_all([c1^2 + c2, c1^2 * c2, R(3)], [x, 2 * x^2])
+        [3*x^2, 2*x^4, 3]
+        sage: T.<c> = PolynomialRing(QQ)
+        sage: substitute_all([1 + c / 2], [x])
+        [1/2*x + 1]
+
+    """
+    one = Sequence(values).universe().one()
+    monomials = {(0,) * len(values): one}
+
+    def monomial_value(e):
+        if e not in monomials:
+            # 添字の最も小さい因子を外す. 低い次数の類ほど項が少なく, 積が軽い
+            j = next(i for i, k in enumerate(e) if k)
+            lower = e[:j] + (e[j] - 1,) + e[j + 1 :]
+            monomials[e] = monomial_value(lower) * values[j]
+        return monomials[e]
+
+    result = []
+    for F in polynomials:
+        value = one - one
+        for e, c in F.dict().items():
+            # 一変数の多項式環では指数が整数で与えられる
+            e = (e,) if isinstance(e, (int, Integer)) else tuple(e)
+            value += c * monomial_value(e)
+        result.append(value)
+    return result
+
+
+# 多変数Horner法の式木を作る関数. `terms`は先頭`k`変数を取り除いた指数から係数への辞書
+def _horner_expression(terms: dict, variables: list, k: int, constant):
+    if k == len(variables):
+        return constant(terms[()])
+
+    # 変数`variables[k]`の冪ごとに分け, 高い冪から順に括り出す
+    groups = {}
+    for e, c in terms.items():
+        groups.setdefault(e[0], {})[e[1:]] = c
+
+    result = None
+    for p in range(max(groups), -1, -1):
+        if result is not None:
+            result = result * variables[k]
+        if p in groups:
+            h = _horner_expression(groups[p], variables, k + 1, constant)
+            result = h if result is None else result + h
+    return result
+
+
+# 多変数Horner法で評価するコンパイル済みの関数を返す関数.
+# 同じ多項式に対しては式木を組み直さずに, コンパイル済みのものを使い回す
+def horner_callable(F, domain):
+    r"""
+
+    Return the function evaluating the polynomial ``F`` at points of
+    ``domain``, compiled with ``fast_callable`` from the multivariate
+    Horner form of ``F``.
+
+    EXAMPLES::
+
+        sage: from homogeneous_space._polyutil import horner_callable
+        sage: R.<x0, x1> = PolynomialRing(QQ)
+        sage: f = horner_callable(x0^2 + 2 * x0 * x1 + 3 * x1 + 1, RDF)
+        sage: f(1.0, 2.0)
+        12.0
+
+    """
+    # 変数の個数が異なる環の多項式も等しいと判定されるので, 環もキャッシュのキーに含める
+    return _horner_callable(F, F.parent(), domain)
+
+
+# 積分した多項式をすべて保持し続けないように, 最近使ったものだけを残す
+_HORNER_CACHE_SIZE = 128
+
+
+@lru_cache(maxsize=_HORNER_CACHE_SIZE)
+def _horner_callable(F, ring, domain):
+    return fast_callable(
+        _horner_tree(F, ring), vars=ring.variable_names(), domain=domain
+    )
+
+
+# Horner法の式木. 係数は有理数のまま持ち, 精度の異なる体でのコンパイルに使い回す
+@lru_cache(maxsize=_HORNER_CACHE_SIZE)
+def _horner_tree(F, ring):
+    names = ring.variable_names()
+    etb = ExpressionTreeBuilder(vars=names)
+    terms = {tuple(e): c for e, c in F.dict().items()}
+    if not terms:
+        return etb.constant(0)
+    return _horner_expression(terms, [etb.var(v) for v in names], 0, etb.constant)
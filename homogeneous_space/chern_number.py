@@ -40,14 +40,8 @@ REFERENCES:
 #                  https://www.gnu.org/licenses/
 # ****************************************************************************
 
-from sage.all import prod
 from homogeneous_space.interfaces import AlmostComplexManifold
 
-# `degree`次部分を取り出す関数
-homogeneous_part = lambda F, degree: sum(
-    c * m for c, m in F if m.total_degree() == degree
-)
-
 
 def chern_number(
     manifold: AlmostComplexManifold, degrees: list, option="symbolic"
@@ -85,8 +79,20 @@ def chern_number(
         -200
 
     """
-    if sum(d for d in degrees) != manifold.dimension():
+    if sum(degrees) != manifold.dimension():
         return 0
     else:
+        # 次数の並べ替えで結果は変わらないので, 整列した組でキャッシュを共有する
+        return _chern_number(manifold, tuple(sorted(degrees, reverse=True)), option)
+
+
+def _chern_number(manifold: AlmostComplexManifold, degrees: tuple, option) -> int:
+    # Chern数は多様体ごとの値なので, モジュールのキャッシュではなく多様体に覚えておく
+    def compute():
         chern_classes = manifold.chern_classes()
-        return manifold.integration(prod([chern_classes[d] for d in degrees]), option)
+        # 積を展開せずに渡し, 因子ごとの値を使い回せる積分に任せる
+        return manifold.integration_of_product(
+            [chern_classes[d] for d in degrees], option
+        )
+
+    return manifold._memoize("_chern_numbers", (degrees, option), compute)
@@ -42,17 +42,15 @@ REFERENCES:
 #                  https://www.gnu.org/licenses/
 # ****************************************************************************
 
-from sage.all import prod, vector
 from homogeneous_space.homogeneous_space import (
     CompletelyReducibleEquivariantVectorBundle,
 )
 from homogeneous_space.interfaces import AlmostComplexManifold, VectorBundle
-from functools import cache
-
-
-homogeneous_part = lambda F, degree: sum(
-    c * m for c, m in F if m.total_degree() == degree
+from homogeneous_space._polyutil import (
+    homogeneous_part,
+    graded_product_truncation,
 )
+from functools import cache, cached_property
 
 
 class CompleteIntersection(AlmostComplexManifold):
@@ -92,6 +90,15 @@ class CompleteIntersection(AlmostComplexManifold):
         self.vector_bundle = vector_bundle
         self.dim = self.homogeneous_space.dimension() - self.vector_bundle.rank()
 
+    # ウェイトを座標のタプルに直すのは最初に必要になったときの一度だけにする
+    @cached_property
+    def _weight_tuples(self) -> list:
+        n = len(self.homogeneous_space.x)
+        return [
+            (tuple(w[l] for l in range(n)), i)
+            for w, i in self.vector_bundle.weight_multiplicities.items()
+        ]
+
     def __repr__(self) -> str:
         return f"a complete intersection of {self.homogeneous_space} and {self.vector_bundle}"
 
@@ -113,6 +120,8 @@ class CompleteIntersection(AlmostComplexManifold):
         """
         return self.dim
 
+    # 同じ接束を返すことで, そのchern類のキャッシュも共有する
+    @cache
     def tangent_bundle(self):
         r"""
         Return the tangent bundle of this variety
@@ -132,6 +141,8 @@ class CompleteIntersection(AlmostComplexManifold):
 
         return VB()
 
+    # 次数ごとのchern類
+    @cache
     def chern_classes(self):
         r"""
         Return the list of homogeneous parts of Chern classes of the tangent bundle of this variety
@@ -152,23 +163,27 @@ class CompleteIntersection(AlmostComplexManifold):
              -51*x0^3 - 13*x0^2*x1 - 13*x0^2*x2 - 3*x0*x1*x2 - 13*x0^2*x3 - 3*x0*x1*x3 - 3*x0*x2*x3 - x1*x2*x3 - 13*x0^2*x4 - 3*x0*x1*x4 - 3*x0*x2*x4 - x1*x2*x4 - 3*x0*x3*x4 - x1*x3*x4 - x2*x3*x4]
         """
 
-        def class_from_weight(weight):
-            return sum(
-                weight[i] * self.homogeneous_space.x[i]
-                for i in range(
-                    self.homogeneous_space.parabolic_subgroup.ambient_space().dimension()
-                )
-            )
+        X = self.homogeneous_space
+        dim = self.dim
 
-        def geometric_sequence(n, x):
-            return sum(x**i for i in range(0, n + 1))
+        # 接束の部分は全空間上でキャッシュされたものを使う
+        factors = [X._total_chern_class(dim)]
+        for w, i in self._weight_tuples:
+            # 同じウェイトに対する級数はHomogeneousSpace上で使い回す
+            factors.append(X._inverse_class_from_weight(w, i, dim))
 
-        cc = prod(1 + x for x in self.homogeneous_space.tangent_weights) * prod(
-            geometric_sequence(self.dim, -class_from_weight(vector(w))) ** i
-            for w, i in self.vector_bundle.weight_multiplicities.items()
-        )
+        # 途中の積の項数が小さく保たれるように, 項の少ない因子から掛ける
+        factors.sort(key=lambda F: len(F.dict()))
+        return graded_product_truncation(factors, dim, X.ring)
 
-        return [homogeneous_part(cc, i) for i in range(0, self.dim + 1)]
+    # 法束のトップChern類. 積分のたびに計算し直さないようにキャッシュする
+    @cache
+    def _top_chern_class(self):
+        r"""
+        Return the top Chern class of the vector bundle defining this variety
+        """
+        # 全てのChern類は要らないので, トップの次数までしか積を作らない
+        return self.vector_bundle.chern_class(self.vector_bundle.rank())
 
     def numerical_integration_by_localization(self, f):
         r"""
@@ -196,15 +211,7 @@ class CompleteIntersection(AlmostComplexManifold):
             -200
 
         """
-        top_of_f = homogeneous_part(f, self.dim)
-        c_top = (
-            self.vector_bundle.chern_classes()[self.vector_bundle.rank()]
-            if self.dim >= 0
-            else 0
-        )
-        return self.homogeneous_space.numerical_integration_by_localization(
-            top_of_f * c_top
-        )
+        return self.integration(f, option="numerical")
 
     @cache
     def integration(self, f, option="symbolic") -> int:
@@ -213,10 +220,37 @@ class CompleteIntersection(AlmostComplexManifold):
         Implementation of the abstract method.
 
         """
+        # 空集合上の積分は0なので, 斉次部分も取り出さない
+        if self.dim < 0:
+            return 0
+
         top_of_f = homogeneous_part(f, self.dim)
-        c_top = (
-            self.vector_bundle.chern_classes()[self.vector_bundle.rank()]
-            if self.dim >= 0
-            else 0
-        )
+        c_top = self._top_chern_class()
         return self.homogeneous_space.integration(top_of_f * c_top, option=option)
+
+    def integration_of_product(self, factors, option="symbolic") -> int:
+        r"""
+
+        Return the integration of the product of ``factors`` with option ``option``.
+
+        EXAMPLES::
+
+            sage: from homogeneous_space.parabolic import ParabolicSubgroup
+            sage: from homogeneous_space.homogeneous_space import HomogeneousSpace, IrreducibleEquivariantVectorBundle
+            sage: from homogeneous_space.complete_intersection import CompleteIntersection
+            sage: P = ParabolicSubgroup(CartanType('A4'), CartanType('A3'), [1])
+            sage: X = HomogeneousSpace(P)
+            sage: E = IrreducibleEquivariantVectorBundle(X,(5, 0, 0, 0, 0))
+            sage: quintic = CompleteIntersection(E)
+            sage: c = quintic.chern_classes()
+            sage: quintic.integration_of_product([c[1], c[2]], option="numerical")
+            0
+
+        """
+        if self.dim < 0:
+            return 0
+
+        # 法束のトップChern類も因子の一つとして全空間上で積分する
+        return self.homogeneous_space.integration_of_product(
+            list(factors) + [self._top_chern_class()], option
+        )
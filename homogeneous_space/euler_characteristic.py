@@ -39,6 +39,7 @@ REFERENCES:
 # ****************************************************************************
 
 from homogeneous_space.interfaces import AlmostComplexManifold, VectorBundle
+from homogeneous_space._polyutil import homogeneous_part, product_truncation
 
 
 def euler_characteristic(
@@ -74,12 +75,16 @@ def euler_characteristic(
         35
 
     """
-    chern_character = vector_bundle.chern_character()
-    todd_classes = variety.todd_classes()
-
-    return variety.integration(
-        sum(
-            chern_character[i] * todd_classes[variety.dimension() - i]
-            for i in range(0, variety.dimension() + 1)
-        )
+    dim = manifold.dimension()
+    chern_character = vector_bundle.chern_character_total()
+    todd_class = sum(manifold.todd_classes())
+
+    # ch(E) td(X) の最高次部分だけを, dim次より高い項を作らずに取り出す
+    integrand = homogeneous_part(
+        product_truncation(
+            [chern_character, todd_class], dim, chern_character.parent()
+        ),
+        dim,
     )
+
+    return manifold.integration(integrand)
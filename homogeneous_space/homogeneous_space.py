@@ -45,17 +45,107 @@ AUTHORS:
 #                  https://www.gnu.org/licenses/
 # ****************************************************************************
 
-from random import random
-from sage.all import PolynomialRing, QQ, prod, RealField, vector, WeylGroup, Matrix
+from sage.all import (
+    PolynomialRing,
+    QQ,
+    ZZ,
+    RDF,
+    prod,
+    RealField,
+    vector,
+    WeylGroup,
+    Matrix,
+    binomial,
+    primes_first_n,
+    lcm,
+    factorial,
+    PowerSeriesRing,
+)
 from homogeneous_space.parabolic import ParabolicSubgroup
 from homogeneous_space.interfaces import AlmostComplexManifold, VectorBundle
-from functools import cache
+from homogeneous_space._polyutil import (
+    homogeneous_part,
+    graded_linear_product,
+    graded_product_truncation,
+    horner_callable,
+)
+from functools import cache, cached_property, lru_cache
+from collections import Counter
+from multiprocessing import Pool
 
 
-# `degree`次部分を取り出す関数
-homogeneous_part = lambda F, degree: sum(
-    c * m for c, m in F if m.total_degree() == degree
-)
+# 数値的な局所化で順に試す精度(ビット数). 53ビットでは倍精度の浮動小数点数を使い,
+# 和が整数に十分近くなければ精度を上げる
+_PRECISIONS = (53, 200, 1000)
+
+# 空間ごとに覚えておく積分値の個数. 積分した多項式をすべて保持し続けないようにする
+_INTEGRAL_CACHE_SIZE = 128
+
+
+# 精度`precision`の実数体
+def _real_field(precision: int):
+    return RDF if precision == 53 else RealField(precision)
+
+
+# Weyl群の軌道の一部の点での局所化の和. 子プロセスから呼べるようにモジュールの関数にする
+def _orbit_sum(f, points, precision: int):
+    r"""
+    Return the pair of the sum of `f(x) / e(x)` and the sum of its absolute
+    values over the pairs of a point `x` and the reciprocal `1 / e(x)` of the
+    product of the tangent weights in ``points``, computed in
+    ``_real_field(precision)``.
+    """
+    # 被積分関数はHorner法の形で一度だけコンパイルし, 各点で評価する
+    evaluate = horner_callable(f, _real_field(precision))
+    terms = [evaluate(*x) * inverse for x, inverse in points]
+    return sum(terms), sum([t.abs() for t in terms])
+
+
+# 剰余類の代表元の一部での記号的な局所化の和. 子プロセスから呼べるようにモジュールの関数にする
+def _symbolic_orbit_sum(f, tangent_weights, matrices, ring):
+    r"""
+    Return the sum of `f(Mx) / \prod_w w(Mx)` over the matrices `M` in
+    ``matrices``, where `w` runs over ``tangent_weights`` and `x` is the
+    vector of the generators of ``ring``.
+    """
+    x = vector(ring, ring.gens())
+    # 接ウェイトの積は展開せず, 代入した一次式の積とする
+    return sum(
+        [f(*(M * x)) / prod([w(*(M * x)) for w in tangent_weights]) for M in matrices]
+    )
+
+
+# 和`result`が整数に十分近ければその整数を, そうでなければNoneを返す関数
+def _round_if_close(result, magnitude, precision: int):
+    r"""
+    Return the integer nearest to ``result`` if ``result`` is within
+    `\varepsilon = 2^{-\min(precision/2, 100)}` of it, otherwise ``None``.
+
+    The sum of the absolute values of the terms of ``result`` is given by
+    ``magnitude``; if the precision cannot resolve `\varepsilon` at this
+    magnitude, ``None`` is returned.
+    """
+    epsilon = 2 ** (-min(precision // 2, 100))
+    # 項が大きく和の刻みが`epsilon`より粗いと, どんな値も整数に近く見えてしまう
+    if magnitude * 2 ** (-precision) >= epsilon:
+        return None
+    # 桁落ちで誤差が大きければ, 和が偶然この幅で整数に近づくことはまずない
+    if (result - result.round()).abs() < epsilon:
+        return result.round()
+    return None
+
+
+# Todd類の級数 (t / (1 - e^{-t}))^multiplicity の`degree`次までの係数. ウェイトによらないので使い回す
+@cache
+def _todd_series(multiplicity: int, degree: int) -> list:
+    r"""
+    Return the list of the coefficients of `(t / (1 - e^{-t}))^{multiplicity}`
+    up to degree ``degree``.
+    """
+    t = PowerSeriesRing(QQ, "t", default_prec=degree + 2).gen()
+    # (1 - e^{-t}) / t の逆数として求める
+    s = (1 - (-t).exp(degree + 2)).shift(-1)
+    return ((~s) ** multiplicity).padded_list(degree + 1)
 
 
 class HomogeneousSpace(AlmostComplexManifold):
@@ -85,26 +175,83 @@ class HomogeneousSpace(AlmostComplexManifold):
 
         """
         self.parabolic_subgroup = parabolic_subgroup
+        n = parabolic_subgroup.ambient_space().dimension()
 
-        # コホモロジー環を含む環
-        self.ring = PolynomialRing(
-            QQ, "x", parabolic_subgroup.ambient_space().dimension()
-        )
+        # コホモロジー環を含む環. 記号環SRではなくQQ上の多項式環で計算する.
+        # B, D型などではウェイトの座標が半整数になるので, 係数はZZではなくQQとする
+        self.ring = PolynomialRing(QQ, "x", n, implementation="singular")
         self.x = self.ring.gens()
+        # 各変数x_iの指数
+        self._unit_exponents = tuple(
+            tuple(int(i == j) for j in range(n)) for i in range(n)
+        )
 
-        self.tangent_weights = [
-            sum(
-                r[l] * self.x[l]
-                for l in range(parabolic_subgroup.ambient_space().dimension())
-            )
-            for r in set(parabolic_subgroup.R_G.positive_roots())
-            - set(parabolic_subgroup.positive_roots())
-        ]
+        # Levi部分群に含まれない正ルート. 接空間のウェイトになる.
+        # Gの正ルートの順序を保ったまま, Pの正ルートの集合で除く
+        parabolic_roots = set(parabolic_subgroup.positive_roots())
+        self._complement_roots = tuple(
+            r
+            for r in parabolic_subgroup.R_G.positive_roots()
+            if r not in parabolic_roots
+        )
+
+        self.tangent_weights = tuple(
+            self.class_from_weight(r) for r in self._complement_roots
+        )
         self.dim = len(self.tangent_weights)
 
     def __repr__(self) -> str:
         return f"a homogeneous_space associated to {self.parabolic_subgroup}"
 
+    def class_from_weight(self, weight):
+        r"""
+        Return the linear form in ``self.ring`` whose coefficients are the
+        coordinates of ``weight`` in the ambient space
+
+        EXAMPLES::
+
+            sage: from homogeneous_space.homogeneous_space import HomogeneousSpace
+            sage: from homogeneous_space.parabolic import ParabolicSubgroup
+            sage: P = ParabolicSubgroup(CartanType('A4'), CartanType('A3'), [1])
+            sage: X = HomogeneousSpace(P)
+            sage: X.class_from_weight((3, 0, 1, 0, -1))
+            3*x0 + x2 - x4
+
+        """
+        return self._class_from_weight(
+            tuple(weight[i] for i in range(len(self._unit_exponents)))
+        )
+
+    # 同じウェイトに対する一次式は使い回す
+    @cache
+    def _class_from_weight(self, weight: tuple):
+        r"""
+        Cached implementation of :meth:`class_from_weight`, where
+        ``weight`` is given as a tuple of coordinates.
+        """
+        # 一次式を項の辞書から直接構成する
+        return self.ring(
+            {e: w for e, w in zip(self._unit_exponents, weight) if w != 0}
+        )
+
+    @cache
+    def _inverse_class_from_weight(
+        self, weight: tuple, multiplicity: int, degree: int
+    ):
+        r"""
+        Return `(1 + L)^{-multiplicity}` truncated at ``degree``, where `L` is
+        the class of ``weight``, by the binomial expansion
+        `\sum_k \binom{multiplicity + k - 1}{k} (-L)^k`.
+        """
+        x = -self._class_from_weight(weight)
+        # 冪は前の項に掛けて順に作る
+        term = self.ring.one()
+        result = term
+        for k in range(1, degree + 1):
+            term = term * x
+            result += binomial(multiplicity + k - 1, k) * term
+        return result
+
     def dimension(self) -> int:
         r"""
         Return the dimension of this variety
@@ -121,16 +268,13 @@ class HomogeneousSpace(AlmostComplexManifold):
         """
         return self.dim
 
+    @cache
     def tangent_bundle(self) -> VectorBundle:
         r"""
         Return the tangent bundle of this variety
         """
 
-        tangent_weights = {
-            r: 1
-            for r in set(self.parabolic_subgroup.R_G.positive_roots())
-            - set(self.parabolic_subgroup.positive_roots())
-        }
+        tangent_weights = {r: 1 for r in self._complement_roots}
 
         return EquivariantVectorBundle(self, tangent_weights)
 
@@ -154,13 +298,21 @@ class HomogeneousSpace(AlmostComplexManifold):
              x0^4 - x0^3*x1 - x0^3*x2 + x0^2*x1*x2 - x0^3*x3 + x0^2*x1*x3 + x0^2*x2*x3 - x0*x1*x2*x3 - x0^3*x4 + x0^2*x1*x4 + x0^2*x2*x4 - x0*x1*x2*x4 + x0^2*x3*x4 - x0*x1*x3*x4 - x0*x2*x3*x4 + x1*x2*x3*x4]
 
         """
-        return [
-            homogeneous_part(prod(1 + x for x in self.tangent_weights), i)
-            for i in (range(0, self.dim + 1))
-        ]
+        # 積を展開せずに, 次数ごとの斉次部分を層ごとに更新する
+        return graded_linear_product(
+            [(x, 1) for x in self.tangent_weights], self.dim, self.ring
+        )
 
+    # 接束の全Chern類. この空間上の完全交叉でも使い回すためキャッシュする
     @cache
-    def numerical_integration_by_localization(self, f):
+    def _total_chern_class(self, degree: int):
+        r"""
+        Return the total Chern class `\prod (1 + x)` of the tangent bundle,
+        where `x` runs over the tangent weights, truncated at ``degree``.
+        """
+        return sum(self.chern_classes()[: degree + 1])
+
+    def numerical_integration_by_localization(self, f, processes: int = 1):
         r"""
 
         Return the numerical computation of the integration of equivariant cohomology classes.
@@ -169,6 +321,10 @@ class HomogeneousSpace(AlmostComplexManifold):
 
         - ``f`` -- an equivariant cohomology class on this variety
 
+        - ``processes`` -- integer (default: 1) -- the number of worker
+          processes; if it is greater than 1, the sum over the Weyl group
+          orbit is split among them
+
         OUTPUT:
 
         the numerical computation of the integration of the  equivariant cohomology class ``f``.
@@ -181,41 +337,181 @@ class HomogeneousSpace(AlmostComplexManifold):
             sage: X = HomogeneousSpace(P)
             sage: X.numerical_integration_by_localization(X.chern_classes()[X.dimension()])
             5
+            sage: X.numerical_integration_by_localization(X.chern_classes()[1]^4, processes=2)
+            625
 
         """
 
-        random_x = [
-            RealField(1000)(random())
-            for i in range(self.parabolic_subgroup.ambient_space().dimension())
-        ]
-        orbit_of_random_x = [
-            (w.inverse() * vector(RealField(1000), random_x)).list()
-            for w in WeylGroup(self.parabolic_subgroup.G)
-        ]
         top_of_f = homogeneous_part(f, self.dim)
-        denominator_in_localization = prod(self.tangent_weights)
 
-        len_of_wg_of_L = (
-            1
-            if self.parabolic_subgroup.L is None
-            else len(WeylGroup(self.parabolic_subgroup.L))
+        # 値はプロセス数によらないので, 被積分関数だけをキーにして覚えておく
+        return self._memoize(
+            "_numerical_integrals",
+            top_of_f,
+            lambda: self._numerical_integration(top_of_f, processes),
+            maxsize=_INTEGRAL_CACHE_SIZE,
         )
 
+    def _numerical_integration(self, top_of_f, processes: int):
+        r"""
+        Return the integration of the homogeneous class ``top_of_f`` of
+        degree the dimension, trying the precisions of ``_PRECISIONS`` in
+        order and falling back to the exact computation.
+        """
         if top_of_f == 0:
             return 0
         else:
-            return (
-                sum(
-                    [
-                        top_of_f(x) / denominator_in_localization(x)
-                        for x in orbit_of_random_x
-                    ]
-                ).round()
-                / len_of_wg_of_L
+            for precision in _PRECISIONS:
+                points = self._localization_data(precision)
+                if processes <= 1:
+                    result, magnitude = _orbit_sum(top_of_f, points, precision)
+                else:
+                    # 軌道を同じ大きさの塊に分けて各プロセスで和を取る
+                    size = -(-len(points) // processes)
+                    with Pool(processes) as pool:
+                        sums = pool.starmap(
+                            _orbit_sum,
+                            [
+                                (top_of_f, points[i : i + size], precision)
+                                for i in range(0, len(points), size)
+                            ],
+                        )
+                    result = sum([r for r, m in sums])
+                    magnitude = sum([m for r, m in sums])
+
+                rounded = _round_if_close(result, magnitude, precision)
+                if rounded is not None:
+                    return rounded
+
+            # どの精度でも整数に十分近くなければ, 丸めずに厳密に計算し直す
+            return self.exact_integration_by_localization(top_of_f)
+
+    @cache
+    def exact_integration_by_localization(self, f):
+        r"""
+
+        Return the exact computation of the integration of equivariant cohomology classes.
+
+        The localization formula is evaluated at the fixed points of a
+        regular integral point, with the integrand evaluated in integer
+        arithmetic.
+
+        INPUT:
+
+        - ``f`` -- an equivariant cohomology class on this variety
+
+        OUTPUT:
+
+        the integration of the equivariant cohomology class ``f``.
+
+        EXAMPLES::
+
+            sage: from homogeneous_space.homogeneous_space import HomogeneousSpace
+            sage: from homogeneous_space.parabolic import ParabolicSubgroup
+            sage: P = ParabolicSubgroup(CartanType('A4'), CartanType('A3'), [1])
+            sage: X = HomogeneousSpace(P)
+            sage: X.exact_integration_by_localization(X.chern_classes()[X.dimension()])
+            5
+
+        """
+        top_of_f = homogeneous_part(f, self.dim)
+
+        if top_of_f == 0:
+            return 0
+
+        # 係数の分母を払い, 整数係数の多項式として整数点で評価する
+        d = lcm([c.denominator() for c in top_of_f.coefficients()])
+        evaluate = horner_callable((d * top_of_f).change_ring(ZZ), ZZ)
+        return (
+            sum([evaluate(*x) / denominator for x, denominator in self._exact_data()])
+            / d
+        )
+
+    # 固定点の整数データ. 空間ごとに一度だけ計算する
+    @cache
+    def _exact_data(self) -> list:
+        r"""
+        Return the list of pairs of a fixed point scaled to integer
+        coordinates and the exact value of the product of the tangent weights
+        at it.
+        """
+        # 被積分関数と接ウェイトの積はともにdim次斉次なので, 点を定数倍しても和は変わらない
+        points = self._fixed_points()
+        scale = lcm([c.denominator() for x in points for c in x])
+        return [
+            ([ZZ(scale * c) for c in x], scale**self.dim * e)
+            for x, e in zip(points, self._euler_values())
+        ]
+
+    # Weyl群の剰余類の代表元の行列. 数値計算と記号計算で共有し, 空間ごとに一度だけ計算する
+    @cache
+    def _coset_representatives(self) -> list:
+        r"""
+        Return the list of the matrices of the minimal representatives of
+        `W_L \backslash W_G` acting on the ambient space.
+        """
+        W = WeylGroup(self.parabolic_subgroup.G)
+        levi_nodes = set(range(1, self.parabolic_subgroup.G.rank() + 1)) - set(
+            self.parabolic_subgroup.crossed_out_nodes
+        )
+        # 被積分関数はW_Lで不変なので, 剰余類W_L w ごとに一点だけ取ればよい.
+        # 左降下をLeviの単純鏡映に持たない元が各剰余類の最短の代表元になる
+        return [
+            w.matrix()
+            for w in W.weak_order_ideal(
+                lambda w: not any(w.has_left_descent(i) for i in levi_nodes),
+                side="right",
             )
+        ]
+
+    # 局所化に使う固定点. 被積分関数によらないので空間ごとに一度だけ計算する
+    @cache
+    def _fixed_points(self) -> list:
+        r"""
+        Return the list of the fixed points used for localization, with
+        rational coordinates. They are the images of a regular integral point
+        under the minimal representatives of `W_L \backslash W_G`.
+        """
+        n = self.parabolic_subgroup.ambient_space().dimension()
+        matrices = self._coset_representatives()
+
+        # 乱数の代わりに素数の冪を座標とする点を取り, 接ウェイトが軌道上で
+        # 0にならないものが見つかるまで冪を上げる. 有理数で計算するので0の判定は正確
+        t = 1
+        while True:
+            x0 = vector(QQ, [p**t for p in primes_first_n(n)])
+            points = [(M * x0).list() for M in matrices]
+            if all(w(*x) != 0 for x in points for w in self.tangent_weights):
+                return points
+            t += 1
+
+    # 固定点での接ウェイトの積の厳密な値. 積の多項式は展開せず, 一次式の値の積として計算する
+    @cache
+    def _euler_values(self) -> list:
+        r"""
+        Return the list of the exact values of the product of the tangent
+        weights at the fixed points of :meth:`_fixed_points`.
+        """
+        return [
+            prod([w(*x) for w in self.tangent_weights]) for x in self._fixed_points()
+        ]
 
+    # 固定点の数値データ. 精度ごとに一度だけ計算する
     @cache
-    def symbolic_integration_by_localization(self, f):
+    def _localization_data(self, precision: int) -> list:
+        r"""
+        Return the list of pairs of a fixed point and the reciprocal of the
+        product of the tangent weights at it, computed in
+        ``_real_field(precision)``.
+        """
+        RF = _real_field(precision)
+        # 逆数は厳密な値から一度だけ丸めて求め, 和では割り算の代わりに掛け算をする
+        return [
+            ([RF(c) for c in x], RF(1 / e))
+            for x, e in zip(self._fixed_points(), self._euler_values())
+        ]
+
+    def symbolic_integration_by_localization(self, f, processes: int = 1):
         r"""
 
         Return the symbolic computation of the integration of equivariant cohomology classes.
@@ -224,6 +520,10 @@ class HomogeneousSpace(AlmostComplexManifold):
 
         - ``f`` -- an equivariant cohomology class on this variety
 
+        - ``processes`` -- integer (default: 1) -- the number of worker
+          processes; if it is greater than 1, the sum over the coset
+          representatives is split among them
+
         OUTPUT:
 
         the symbolic computation of the integration of the  equivariant cohomology class ``f``.
@@ -236,49 +536,37 @@ class HomogeneousSpace(AlmostComplexManifold):
             sage: X = HomogeneousSpace(P)
             sage: X.symbolic_integration_by_localization(X.chern_classes()[X.dimension()])
             5
+            sage: X.symbolic_integration_by_localization(X.chern_classes()[1]^4, processes=2)
+            625
 
         """
-        S_G = WeylGroup(
-            self.parabolic_subgroup.G.root_system(), implementation="permutation"
+        return self._memoize(
+            "_symbolic_integrals",
+            f,
+            lambda: self._symbolic_integration(f, processes),
+            maxsize=_INTEGRAL_CACHE_SIZE,
         )
 
-        s_G = S_G.simple_reflections()
-        s_P = [
-            s_G[i]
-            for i in set(range(1, len(s_G) + 1))
-            - set(self.parabolic_subgroup.crossed_out_nodes)
-        ]
-        S_P = S_G.subgroup(s_P)
-
-        def cosetRep(G, H):
-            rep = []
-            g = set(G.list())
-            h = {G(e) for e in H.list()}
-            coset = set()
-            while g:
-                p = g.pop()
-                rep.append(p)
-                coset = {p * e for e in h}
-                g = g - coset
-                coset.clear()
-                if len(rep) * H.order() == G.order():
-                    break
-
-            return rep
-
-        W_G = WeylGroup(self.parabolic_subgroup.G.root_system())
-        W_G_mod_W_P = [W_G(w) for w in cosetRep(S_G, S_P)]
-
-        def weyl_group_action(w, f):
-            return f(*(w.inverse() * vector(self.ring, self.ring.gens())))
-
-        return sum(
-            [
-                weyl_group_action(w, f)
-                / weyl_group_action(w, prod(self.tangent_weights))
-                for w in W_G_mod_W_P
-            ]
-        )
+    def _symbolic_integration(self, f, processes: int):
+        r"""
+        Return the symbolic integration of ``f``, with the sum over the coset
+        representatives split among ``processes`` worker processes.
+        """
+        matrices = self._coset_representatives()
+        if processes <= 1:
+            return _symbolic_orbit_sum(f, self.tangent_weights, matrices, self.ring)
+
+        # 代表元を同じ大きさの塊に分けて各プロセスで和を取る
+        size = -(-len(matrices) // processes)
+        with Pool(processes) as pool:
+            sums = pool.starmap(
+                _symbolic_orbit_sum,
+                [
+                    (f, self.tangent_weights, matrices[i : i + size], self.ring)
+                    for i in range(0, len(matrices), size)
+                ],
+            )
+        return sum(sums)
 
     def integration(self, f, option="symbolic") -> int:
         r"""
@@ -291,11 +579,72 @@ class HomogeneousSpace(AlmostComplexManifold):
             return self.symbolic_integration_by_localization(f)
         if option == "numerical":
             return self.numerical_integration_by_localization(f)
+        if option == "exact":
+            return self.exact_integration_by_localization(f)
         else:
             raise TypeError(
                 f"Invalid option in integration on HomogeneousSpace: {option}"
             )
 
+    def integration_of_product(self, factors, option="symbolic") -> int:
+        r"""
+
+        Return the integration of the product of ``factors`` with option ``option``.
+
+        If ``option`` is "numerical" and ``factors`` are homogeneous of total
+        degree the dimension, each factor is evaluated on the Weyl group orbit
+        only once, and the values are reused for every product containing it.
+
+        EXAMPLES::
+
+            sage: from homogeneous_space.homogeneous_space import HomogeneousSpace
+            sage: from homogeneous_space.parabolic import ParabolicSubgroup
+            sage: P = ParabolicSubgroup(CartanType('A4'), CartanType('A3'), [1])
+            sage: X = HomogeneousSpace(P)
+            sage: c = X.chern_classes()
+            sage: X.integration_of_product([c[1], c[1], c[2]], option="numerical")
+            250
+
+        """
+        factors = list(factors)
+        if any(F == 0 for F in factors):
+            return 0
+
+        if (
+            option != "numerical"
+            or any(not F.is_homogeneous() for F in factors)
+            or sum(F.degree() for F in factors) != self.dim
+        ):
+            return self.integration(homogeneous_part(prod(factors), self.dim), option)
+
+        for precision in _PRECISIONS:
+            points = self._localization_data(precision)
+            # 軌道上の各点での値の積を取る
+            values = zip(*[self._orbit_values(F, precision) for F in factors])
+            terms = [prod(v) * inverse for v, (x, inverse) in zip(values, points)]
+            rounded = _round_if_close(
+                sum(terms), sum([t.abs() for t in terms]), precision
+            )
+            if rounded is not None:
+                return rounded
+
+        # 整数に十分近くなければ, 積を展開して厳密な計算に任せる
+        return self.exact_integration_by_localization(
+            homogeneous_part(prod(factors), self.dim)
+        )
+
+    # 斉次なクラスのWeyl群の軌道上での値. 積の積分で因子ごとに使い回す.
+    # 因子と精度の組をすべて保持し続けないように, 最近使ったものだけを残す
+    @lru_cache(maxsize=128)
+    def _orbit_values(self, F, precision: int):
+        r"""
+        Return the list of the values of ``F`` at the points of the Weyl group
+        orbit used for numerical localization, computed in
+        ``_real_field(precision)``.
+        """
+        evaluate = horner_callable(F, _real_field(precision))
+        return [evaluate(*x) for x, inverse in self._localization_data(precision)]
+
 
 class EquivariantVectorBundle(VectorBundle):
     r"""
@@ -307,7 +656,10 @@ class EquivariantVectorBundle(VectorBundle):
     """
 
     def __init__(
-        self, homogeneous_space: HomogeneousSpace, weight_multiplicities: dict
+        self,
+        homogeneous_space: HomogeneousSpace,
+        weight_multiplicities: dict = None,
+        rank: int = None,
     ) -> None:
         r"""
 
@@ -319,7 +671,9 @@ class EquivariantVectorBundle(VectorBundle):
 
         - ``homogeneous_space`` -- ``HomogeneousSpace`` -- the base space of this vector bundle
 
-        - ``weight_multiplicities`` -- dictionary from weights to their multiplicities
+        - ``weight_multiplicities`` -- dictionary from weights to their multiplicities, or None if a subclass provides the attribute ``weight_multiplicities`` on first access
+
+        - ``rank`` -- integer (default: None) -- the rank of this vector bundle; if None, it is the sum of the multiplicities
 
         EXAMPLES::
 
@@ -333,8 +687,12 @@ class EquivariantVectorBundle(VectorBundle):
         """
         self.homogeneous_space = homogeneous_space
 
-        self.weight_multiplicities = weight_multiplicities
-        self.rk = sum(v for v in self.weight_multiplicities.values())
+        # 部分クラスでは重複度を必要になるまで計算せず, 階数を別に与えることがある
+        if weight_multiplicities is not None:
+            self.weight_multiplicities = weight_multiplicities
+        if rank is None:
+            rank = sum(v for v in self.weight_multiplicities.values())
+        self.rk = rank
 
     def __repr__(self) -> str:
         return f"an equivariant vector bundle on {self.homogeneous_space} associated to {self.weight_multiplicities}"
@@ -372,6 +730,7 @@ class EquivariantVectorBundle(VectorBundle):
         """
         return self.homogeneous_space
 
+    @cache
     def chern_classes(self):
         r"""
         Return the list of homogeneous parts of Chern classes of this vector bundle
@@ -388,23 +747,114 @@ class EquivariantVectorBundle(VectorBundle):
 
         """
 
-        def class_from_weight(weight):
-            return sum(
-                weight[i] * self.homogeneous_space.x[i]
-                for i in range(
-                    self.homogeneous_space.parabolic_subgroup.ambient_space().dimension()
-                )
-            )
+        X = self.homogeneous_space
+        dim = X.dim
 
-        cc = prod(
-            (1 + class_from_weight(vector(w))) ** i
-            for w, i in self.weight_multiplicities.items()
-        )
+        # 因子(1 + L)^iごとに, 次数ごとの斉次部分を層ごとに更新する
+        return graded_linear_product(self._chern_linear_forms(), dim, X.ring)
 
-        return [
-            homogeneous_part(cc, i) for i in range(self.homogeneous_space.dim + 1)
+    @cache
+    def chern_class(self, degree: int):
+        r"""
+        Return the Chern class of this vector bundle of degree ``degree``
+
+        Only the terms of the product up to degree ``degree`` are formed,
+        so this is cheaper than :meth:`chern_classes` for small degrees.
+
+        EXAMPLES::
+
+            sage: from homogeneous_space.homogeneous_space import HomogeneousSpace, EquivariantVectorBundle
+            sage: from homogeneous_space.parabolic import ParabolicSubgroup
+            sage: P = ParabolicSubgroup(CartanType('A4'), CartanType('A3'), [1])
+            sage: X = HomogeneousSpace(P)
+            sage: E = EquivariantVectorBundle(X,{(2, 0, 0, 0, 0): 1, (3, 0, 0, 0, 0): 1})
+            sage: E.chern_class(2)
+            6*x0^2
+
+        """
+        X = self.homogeneous_space
+        if degree > X.dim:
+            return X.ring.zero()
+
+        return graded_linear_product(self._chern_linear_forms(), degree, X.ring)[
+            degree
         ]
 
+    @cache
+    def chern_character(self) -> list:
+        r"""
+        Return the list of homogeneous parts of Chern characters of this vector bundle
+
+        The part of degree `k` is the power sum `\sum_w m_w L_w^k / k!` of
+        the classes `L_w` of the weights `w` with multiplicities `m_w`, so
+        the Chern classes are not needed.
+
+        EXAMPLES::
+
+            sage: from homogeneous_space.homogeneous_space import HomogeneousSpace, EquivariantVectorBundle
+            sage: from homogeneous_space.parabolic import ParabolicSubgroup
+            sage: P = ParabolicSubgroup(CartanType('A4'), CartanType('A3'), [1])
+            sage: X = HomogeneousSpace(P)
+            sage: E = EquivariantVectorBundle(X,{(2, 0, 0, 0, 0): 1, (3, 0, 0, 0, 0): 1})
+            sage: E.chern_character()
+            [2, 5*x0, 13/2*x0^2, 35/6*x0^3, 97/24*x0^4]
+
+        """
+        X = self.homogeneous_space
+        dim = X.dim
+
+        power_sums = [X.ring(self.rank())] + [X.ring.zero()] * dim
+        for w, i in self.weight_multiplicities.items():
+            L = X.class_from_weight(w)
+            # 冪は前の項に掛けて順に作る
+            term = i * X.ring.one()
+            for k in range(1, dim + 1):
+                term = term * L
+                power_sums[k] += term
+
+        return [power_sums[k] / factorial(k) for k in range(dim + 1)]
+
+    @cache
+    def todd_classes(self) -> list:
+        r"""
+        Return the list of homogeneous parts of Todd classes of this vector bundle
+
+        The Todd class is the product of `(L_w / (1 - e^{-L_w}))^{m_w}` over
+        the classes `L_w` of the weights `w` with multiplicities `m_w`.
+
+        EXAMPLES::
+
+            sage: from homogeneous_space.homogeneous_space import HomogeneousSpace, EquivariantVectorBundle
+            sage: from homogeneous_space.parabolic import ParabolicSubgroup
+            sage: P = ParabolicSubgroup(CartanType('A4'), CartanType('A3'), [1])
+            sage: X = HomogeneousSpace(P)
+            sage: E = EquivariantVectorBundle(X,{(2, 0, 0, 0, 0): 1, (3, 0, 0, 0, 0): 1})
+            sage: E.todd_classes()
+            [1, 5/2*x0, 31/12*x0^2, 5/4*x0^3, 83/720*x0^4]
+
+        """
+        X = self.homogeneous_space
+        dim = X.dim
+
+        factors = []
+        for w, i in self.weight_multiplicities.items():
+            L = X.class_from_weight(w)
+            coefficients = _todd_series(i, dim)
+            term = X.ring.one()
+            factor = term
+            for k in range(1, dim + 1):
+                term = term * L
+                factor += coefficients[k] * term
+            factors.append(factor)
+
+        # dim次より高い項は作らずに因子を掛ける
+        return graded_product_truncation(factors, dim, X.ring)
+
+    # 全Chern類の因子 (1 + L)^i を表す一次式Lと重複度iの組
+    def _chern_linear_forms(self) -> list:
+        class_from_weight = self.homogeneous_space.class_from_weight
+        return [(class_from_weight(w), i) for w, i in self.weight_multiplicities.items()]
+
 
 class CompletelyReducibleEquivariantVectorBundle(EquivariantVectorBundle):
     def __init__(
@@ -415,31 +865,41 @@ class CompletelyReducibleEquivariantVectorBundle(EquivariantVectorBundle):
         else:
             self.is_irr = False
 
-        def union_multisets(mset1, mset2):
-            result = dict(mset1)
-
-            for key, value in mset2.items():
-                if key in result:
-                    result[key] += value
-                else:
-                    result[key] = value
+        self.highest_weights = highest_weights
 
-            return result
+        # 階数はWeylの次元公式で求め, ウェイトの重複度は必要になるまで計算しない
+        P = homogeneous_space.parabolic_subgroup
+        super().__init__(
+            homogeneous_space,
+            rank=sum(P.representation_dimension(w) for w in highest_weights),
+        )
 
-        def flatten(list_of_mset):
-            result = dict(list_of_mset[0])
+    @cached_property
+    def weight_multiplicities(self) -> dict:
+        r"""
+        Return the dictionary from the weights of this vector bundle to their
+        multiplicities
 
-            for mset in list_of_mset[1:]:
-                result = union_multisets(result, mset)
+        This is computed on the first access.
 
-            return result
+        EXAMPLES::
 
-        weight_multiplicities = flatten(
-            [homogeneous_space.parabolic_subgroup.weight_multiplicities(w)
-             for w in highest_weights])
+            sage: from homogeneous_space.homogeneous_space import HomogeneousSpace, IrreducibleEquivariantVectorBundle
+            sage: from homogeneous_space.parabolic import ParabolicSubgroup
+            sage: P = ParabolicSubgroup(CartanType('A4'), CartanType('A1xA2'), [2])
+            sage: X = HomogeneousSpace(P)
+            sage: E = IrreducibleEquivariantVectorBundle(X,(1, 0, 2, 0))
+            sage: E.rank() == sum(E.weight_multiplicities.values())
+            True
 
-        self.highest_weights = highest_weights
-        super().__init__(homogeneous_space, weight_multiplicities)
+        """
+        # 既約成分ごとのウェイトの重複度を足し合わせる
+        result = Counter()
+        for w in self.highest_weights:
+            result.update(
+                self.homogeneous_space.parabolic_subgroup.weight_multiplicities(w)
+            )
+        return dict(result)
 
     def is_irreducible(self) -> bool:
         return self.is_irr
@@ -31,8 +31,34 @@ REFERENCES:
 # ****************************************************************************
 import re
 
-from sage.all import singular, PolynomialRing, TermOrder, QQ
+from sage.all import singular, PolynomialRing, TermOrder, QQ, factorial, prod
 from abc import ABC, abstractmethod
+from functools import cache
+
+from homogeneous_space._polyutil import homogeneous_parts, substitute_all
+
+
+# Todd類の普遍的な表示. Chern類の個数だけで決まるので使い回す
+@cache
+def _universal_todd_classes(len_cc: int) -> list:
+    r"""
+    Return the homogeneous parts of the Todd class as polynomials in
+    the Chern classes `c_1, \ldots, c_{len\_cc}`.
+    """
+    ring_for_td = PolynomialRing(
+        QQ,
+        [f"c{i}_M" for i in (range(1, len_cc + 1))],
+        order=TermOrder("wdeglex", tuple(range(1, len_cc + 1))),
+    )
+
+    # Using Singular, calculate universal formula of Todd classes
+    singular = _chern_lib()
+    r = singular.ring(0, f"(c(1..{len_cc}))", "dp")
+    l = singular.list(f"c(1..{len_cc})")
+    todd_str_list = singular.todd(l).sage_structured_str_list()
+    return [ring_for_td(1)] + [
+        ring_for_td(re.sub(r"c\(([0-9]+)\)", r"c\1_M", s)) for s in todd_str_list
+    ]
 
 
 class VectorBundle(ABC):
@@ -65,6 +91,7 @@ class AlmostComplexManifold(ABC):
         """
         pass
 
+    @cache
     def cotangent_bundle(self) -> VectorBundle:
         r"""
         Return the cotangent bundle of this almost complex manifold
@@ -80,7 +107,7 @@ class AlmostComplexManifold(ABC):
 
         - ``f`` -- a cohomology class
 
-        - ``option`` -- a string specifying the integration option. If "symbolic", it will perform precise polynomial calculations; if "numerical", it will expect to perform integral calculations using numerical computation.
+        - ``option`` -- a string specifying the integration option. If "symbolic", it will perform precise polynomial calculations; if "numerical", it will expect to perform integral calculations using numerical computation; if "exact", it will evaluate the integrand exactly at integral points.
 
         OUTPUT:
 
@@ -89,6 +116,12 @@ class AlmostComplexManifold(ABC):
         """
         pass
 
+    def integration_of_product(self, factors, option) -> int:
+        r"""
+        Return the integration of the product of the cohomology classes ``factors`` on this almost complex manifold with option ``option``
+        """
+        return self.integration(prod(factors), option)
+
     def chern_classes(self) -> list:
         r"""
         Return the list of homogeneous parts of Chern classes of the tangent bundle of this almost complex manifold
@@ -100,11 +133,31 @@ class AlmostComplexManifold(ABC):
         r"""
         Return the todd classes of the tangent bundle of this almost complex manifold
         """
-        # return self.tangent_bundle().todd_classes()
-        pass
-
-
-singular.lib("chern.lib")
+        return self.tangent_bundle().todd_classes()
+
+    # インスタンスの辞書`name`に`key`で値を覚えておき, なければ`compute()`で求める.
+    # 引数の一部だけをキーにしたいときに, 関数のキャッシュの代わりに使う.
+    # `maxsize`を与えると, 最近使ったものから`maxsize`個だけを残す
+    def _memoize(self, name: str, key, compute, maxsize: int = None):
+        memo = self.__dict__.setdefault(name, {})
+        if key in memo:
+            # 辞書の順序を使った順にするため, 末尾に入れ直す
+            memo[key] = memo.pop(key)
+        else:
+            memo[key] = compute()
+            if maxsize is not None and len(memo) > maxsize:
+                del memo[next(iter(memo))]
+        return memo[key]
+
+
+# Singularの起動はimport時ではなく, 初めて必要になったときに一度だけ行う
+@cache
+def _chern_lib():
+    r"""
+    Load the Singular library ``chern.lib`` and return the Singular interface.
+    """
+    singular.lib("chern.lib")
+    return singular
 
 
 class VectorBundle(ABC):
@@ -135,6 +188,12 @@ class VectorBundle(ABC):
         """
         pass
 
+    def chern_class(self, degree: int):
+        r"""
+        Return the Chern class of this vector bundle of degree ``degree``
+        """
+        return self.chern_classes()[degree]
+
     # 演算子のオーバーロード
     def __add__(self, other) -> VectorBundle:
         r"""
@@ -152,35 +211,27 @@ class VectorBundle(ABC):
         """
         return tensor_product(self, other)
 
+    @cache
     def chern_character(self) -> list:
         r"""
         Return the list of homogeneous parts of Chern characters of this vector bundle
         """
-        len_cc = len(self.chern_classes()) - 1
-
-        ring_for_ch = PolynomialRing(
-            QQ,
-            [f"c{i}_E" for i in (range(1, len_cc + 1))],
-            order=TermOrder("wdeglex", tuple(range(1, len_cc + 1))),
-        )
-
-        # Using Singular, calculate universal formula of chern character
-        singular.lib("chern.lib")
-        r = singular.ring(0, f"(c(1..{len_cc}))", "dp")
-        l = singular.list(f"c(1..{len_cc})")
-        ch_str_list = singular.chAll(
-            l, self.base().dimension()
-        ).sage_structured_str_list()
-        chern_character = [ring_for_ch(self.rank())] + [
-            ring_for_ch(re.sub(r"c\(([0-9]+)\)", r"c\1_E", s)) for s in ch_str_list
-        ]
-
-        chern_classes = self.chern_classes()[1:]
-
-        return [
-            chern_character[i](chern_classes)
-            for i in (range(0, self.base().dimension() + 1))
-        ]
+        dim = self.base().dimension()
+        chern_classes = self.chern_classes()
+        len_cc = len(chern_classes) - 1
+
+        # Newtonの恒等式で冪和 p_k = k! ch_k をChern類から順に求める
+        power_sums = [self.rank() * chern_classes[0]]
+        for k in range(1, dim + 1):
+            p = sum(
+                (-1) ** (i - 1) * chern_classes[i] * power_sums[k - i]
+                for i in range(1, min(k - 1, len_cc) + 1)
+            )
+            if k <= len_cc:
+                p += (-1) ** (k - 1) * k * chern_classes[k]
+            power_sums.append(p)
+
+        return [power_sums[k] / factorial(k) for k in range(dim + 1)]
 
     def chern_character_total(self):
         r"""
@@ -188,32 +239,21 @@ class VectorBundle(ABC):
         """
         return sum(c for c in self.chern_character())
 
+    @cache
     def todd_classes(self) -> list:
         r"""
         Return the list of homogeneous parts of Todd classes of this vector bundle
         """
         len_cc = len(self.chern_classes()) - 1
 
-        ring_for_td = PolynomialRing(
-            QQ,
-            [f"c{i}_M" for i in (range(1, len_cc + 1))],
-            order=TermOrder("wdeglex", tuple(range(1, len_cc + 1))),
-        )
-
-        # Using Singular, calculate universal formula of Todd classes
-        r = singular.ring(0, f"(c(1..{len_cc}))", "dp")
-        l = singular.list(f"c(1..{len_cc})")
-        todd_str_list = singular.todd(l).sage_structured_str_list()
-        todd_classes = [ring_for_td(1)] + [
-            ring_for_td(re.sub(r"c\(([0-9]+)\)", r"c\1_M", s)) for s in todd_str_list
-        ]
+        todd_classes = _universal_todd_classes(len_cc)
 
         chern_classes = self.chern_classes()[1:]
 
-        return [
-            todd_classes[i](chern_classes)
-            for i in (range(0, self.base().dimension() + 1))
-        ]
+        # 単項式の値を次数の間で共有して代入する
+        return substitute_all(
+            todd_classes[: self.base().dimension() + 1], chern_classes
+        )
 
     def dual(self) -> VectorBundle:
         r"""
@@ -228,6 +268,7 @@ class VectorBundle(ABC):
             def base(self) -> AlmostComplexManifold:
                 return vector_bundle.base()
 
+            @cache
             def chern_classes(self) -> list:
                 chern_classes = vector_bundle.chern_classes()
                 return [(-1) ** i * chern_classes[i] for i in range(len(chern_classes))]
@@ -254,15 +295,7 @@ def direct_sum(vector_bundle1: VectorBundle, vector_bundle2: VectorBundle):
         c2 for c2 in vector_bundle2.chern_classes()
     )
 
-    # `degree`次部分を取り出す関数
-    homogeneous_part = lambda F, degree: sum(
-        c * m for c, m in F if m.total_degree() == degree
-    )
-
-    chern_classes = [
-        homogeneous_part(cc, i)
-        for i in (range(0, vector_bundle1.base().dimension() + 1))
-    ]
+    chern_classes = homogeneous_parts(cc, vector_bundle1.base().dimension())
 
     class VB(VectorBundle):
         def rank(self) -> int:
@@ -301,6 +334,7 @@ def tensor_product(vector_bundle1: VectorBundle, vector_bundle2: VectorBundle):
         + [f"c{i}_E2" for i in (range(1, len_cc2 + 1))],
     )
 
+    singular = _chern_lib()
     r = singular.ring(0, f"(c(1..{len_cc1}), C(1..{len_cc2}))", "dp")
     l1 = singular.list(f"c(1..{len_cc1})")
     l2 = singular.list(f"C(1..{len_cc2})")
@@ -312,10 +346,9 @@ def tensor_product(vector_bundle1: VectorBundle, vector_bundle2: VectorBundle):
     ]
     ch_prod = [ring_for_Es(re.sub(r"C\(([0-9]+)\)", r"c\1_E2", s)) for s in ch_prod]
 
-    cc = [1] + [
-        cp(vector_bundle1.chern_classes()[1:] + vector_bundle2.chern_classes()[1:])
-        for cp in ch_prod
-    ]
+    cc = [1] + substitute_all(
+        ch_prod, vector_bundle1.chern_classes()[1:] + vector_bundle2.chern_classes()[1:]
+    )
 
     cc.extend([0] * (vector_bundle1.base().dimension() + 1 - len(cc)))
 
@@ -354,6 +387,7 @@ def symmetric_power(vector_bundle: VectorBundle, k: int) -> VectorBundle:
         order=TermOrder("wdeglex", tuple(range(1, len_cc + 1))),
     )
 
+    singular = _chern_lib()
     r = singular.ring(0, f"(c(1..{len_cc}))", "dp")
     l = singular.list(f"c(1..{len_cc})")
     ch_symm_str_list = singular.chSymm(k, rank, l).sage_structured_str_list()
@@ -364,7 +398,7 @@ def symmetric_power(vector_bundle: VectorBundle, k: int) -> VectorBundle:
 
     rank = int(ch_symm_str_list[0])
     base = vector_bundle.base()
-    cc = [1] + [cs(chern_classes) for cs in ch_symm]
+    cc = [1] + substitute_all(ch_symm, chern_classes)
     cc.extend([0] * (vector_bundle.base().dimension() + 1 - len(cc)))
 
     class VB(VectorBundle):
@@ -399,6 +433,7 @@ def wedge_power(vector_bundle: VectorBundle, k: int) -> VectorBundle:
         order=TermOrder("wdeglex", tuple(range(1, len_cc + 1))),
     )
 
+    singular = _chern_lib()
     r = singular.ring(0, f"(c(1..{len_cc}))", "dp")
     l = singular.list(f"c(1..{len_cc})")
     ch_wedge_str_list = singular.chWedge(k, rank, l).sage_structured_str_list()
@@ -409,7 +444,7 @@ def wedge_power(vector_bundle: VectorBundle, k: int) -> VectorBundle:
 
     rank = int(ch_wedge_str_list[0])
     base = vector_bundle.base()
-    cc = [1] + [cs(chern_classes) for cs in ch_wedge]
+    cc = [1] + substitute_all(ch_wedge, chern_classes)
     cc.extend([0] * (vector_bundle.base().dimension() + 1 - len(cc)))
 
     class VB(VectorBundle):
@@ -248,12 +248,7 @@ class ParabolicSubgroup:
                     return index + i
             return index + len(self.crossed_out_nodes)
 
-        fws_L = list(self.R_L.fundamental_weights())  # conversion from 1-index to 0-index
-        weight_for_L = [
-            weight[i - 1]
-            for i in set(range(1, len(weight) + 1)) - set(self.crossed_out_nodes)
-        ]
-        weight_for_L = sum(weight_for_L[i] * fws_L[i] for i in range(self.L.rank()))
+        weight_for_L = self._weight_for_L(weight)
 
         fws_G = list(self.R_G.fundamental_weights())
         weight_for_G = sum(weight[i] * fws_G[i] for i in range(self.G.rank()))
@@ -269,3 +264,35 @@ class ParabolicSubgroup:
             result[w] = v
 
         return result
+
+    # 表現の次元. ウェイトを列挙せずにWeylの次元公式で計算する
+    def representation_dimension(self, weight) -> int:
+        r"""
+
+        Return the dimension of the highest weight representation of the Levi
+        subgroup given by ``weight``, computed by the Weyl dimension formula
+
+        INPUT:
+
+        - ``weight`` -- list of integers -- the list of coefficients of fundamental weights
+
+        EXAMPLES::
+
+            sage: from homogeneous_space.parabolic import ParabolicSubgroup
+            sage: P = ParabolicSubgroup(CartanType('A3'), CartanType('A2'), [1])
+            sage: P.representation_dimension((1, 2, 0))
+            6
+        """
+        if self.L is None:
+            return 1
+
+        return self.R_L.space().weyl_dimension(self._weight_for_L(weight))
+
+    # `weight`のうちuncrossed nodeの成分を, Lの基本ウェイトの係数として読んだウェイト
+    def _weight_for_L(self, weight):
+        fws_L = list(self.R_L.fundamental_weights())  # conversion from 1-index to 0-index
+        weight_for_L = [
+            weight[i - 1]
+            for i in set(range(1, len(weight) + 1)) - set(self.crossed_out_nodes)
+        ]
+        return sum(weight_for_L[i] * fws_L[i] for i in range(self.L.rank()))